@@ -0,0 +1,82 @@
+"""
+Compares bytes-on-wire and CPU time of the negotiated response encodings for a
+collection list response.
+
+Run with ``python -m benchmarks.bench_encoding [rows]``.
+"""
+import sys
+import time
+from datetime import datetime
+
+from fastapi.encoders import jsonable_encoder
+
+from framework.encoding import (
+    BrotliCompressor,
+    GzipCompressor,
+    JSONStreamingResponse,
+    MsgPackStreamingResponse,
+    brotli,
+    msgpack,
+)
+
+
+def build_rows(count: int) -> list:
+    now = datetime.now()
+    return [
+        {
+            "id": i,
+            "created_at": now,
+            "updated_at": now,
+            "name": f"Failure mode {i}",
+            "description": f"Seal {i % 17} degrades under thermal cycling at site {i % 31}",
+        }
+        for i in range(count)
+    ]
+
+
+def encode_json(rows: list) -> list:
+    return list(JSONStreamingResponse._encode(rows, jsonable_encoder))
+
+
+def encode_msgpack(rows: list) -> list:
+    return list(MsgPackStreamingResponse._encode(rows, jsonable_encoder))
+
+
+def compress(chunks: list, compressor) -> bytes:
+    if compressor is None:
+        return b"".join(chunks)
+    return b"".join(compressor.compress(chunk) for chunk in chunks) + compressor.finish()
+
+
+def measure(rows: list, encoder, compressor_factory, repeat: int = 5):
+    best = None
+    for _ in range(repeat):
+        started = time.process_time()
+        body = compress(encoder(rows), compressor_factory())
+        elapsed = time.process_time() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return len(body), best
+
+
+def main(row_count: int = 10_000):
+    rows = build_rows(row_count)
+    encoders = {"json": encode_json}
+    if msgpack is not None:
+        encoders["msgpack"] = encode_msgpack
+    compressors = {"identity": lambda: None}
+    for level in (1, 6, 9):
+        compressors[f"gzip-{level}"] = lambda level=level: GzipCompressor(level)
+    if brotli is not None:
+        for quality in (1, 4, 11):
+            compressors[f"br-{quality}"] = lambda quality=quality: BrotliCompressor(quality)
+
+    print(f"{row_count} rows")
+    print(f"{'encoding':<10}{'compression':<14}{'bytes':>12}{'cpu ms':>10}")
+    for encoding, encoder in encoders.items():
+        for compression, factory in compressors.items():
+            size, elapsed = measure(rows, encoder, factory)
+            print(f"{encoding:<10}{compression:<14}{size:>12}{elapsed * 1000:>10.1f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10_000)
@@ -0,0 +1,76 @@
+"""
+Compares concurrent read/write throughput of a file-backed SQLite database with
+and without the ``production`` SQLite profile.
+
+Run with ``python -m benchmarks.bench_sqlite [seconds] [readers] [writers]``.
+"""
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+from framework.database import create_session_factory
+from src.models.process import Failure
+
+
+def run(profile: str, seconds: float, readers: int, writers: int) -> dict:
+    with tempfile.TemporaryDirectory() as directory:
+        url = f"sqlite:///{Path(directory) / 'bench.sqlite3'}"
+        session_factory = create_session_factory(url, sqlite_profile=profile)
+        counts = {"reads": 0, "writes": 0, "errors": 0}
+        lock = threading.Lock()
+        deadline = time.monotonic() + seconds
+
+        def record(key: str):
+            with lock:
+                counts[key] += 1
+
+        def read():
+            while time.monotonic() < deadline:
+                try:
+                    with session_factory() as db:
+                        query = db.query(Failure).filter(Failure.deleted_at == None)
+                        query.limit(50).all()
+                    record("reads")
+                except Exception:
+                    record("errors")
+
+        def write():
+            while time.monotonic() < deadline:
+                try:
+                    with session_factory() as db:
+                        db.add(Failure(name="Bench", created_at=datetime.now()))
+                        db.commit()
+                    record("writes")
+                except Exception:
+                    record("errors")
+
+        threads = [threading.Thread(target=read) for _ in range(readers)]
+        threads += [threading.Thread(target=write) for _ in range(writers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return counts
+
+
+def main(seconds: float = 5.0, readers: int = 8, writers: int = 4):
+    print(f"{readers} readers, {writers} writers, {seconds}s per profile")
+    print(f"{'profile':<12}{'reads/s':>10}{'writes/s':>10}{'errors':>8}")
+    for profile in ("none", "production"):
+        counts = run(profile, seconds, readers, writers)
+        print(
+            f"{profile:<12}{counts['reads'] / seconds:>10.0f}"
+            f"{counts['writes'] / seconds:>10.0f}{counts['errors']:>8}"
+        )
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    main(
+        float(args[0]) if len(args) > 0 else 5.0,
+        int(args[1]) if len(args) > 1 else 8,
+        int(args[2]) if len(args) > 2 else 4,
+    )
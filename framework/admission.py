@@ -0,0 +1,200 @@
+"""
+Admission control for API routes: per-client token-bucket rate limits, and
+per-route and controller-wide concurrency caps with bounded wait queues.
+Requests that cannot be admitted fail fast with 429/503 and ``Retry-After``
+instead of piling up on the database connection pool.
+"""
+import asyncio
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+
+from fastapi import Depends, HTTPException, Request
+
+from .database import pool_capacity
+
+DEFAULT_RATE = 50.0
+DEFAULT_BURST = 100
+DEFAULT_MAX_QUEUE = 32
+DEFAULT_QUEUE_TIMEOUT = 1.0
+DEFAULT_MAX_CLIENTS = 10_000
+
+
+def client_host(request: Request) -> str:
+    return request.client.host if request.client else "unknown"
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def take(self) -> float:
+        """
+        Takes a token, returning ``0`` on success or the seconds until one is
+        available.
+        """
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class ConcurrencyLimiter:
+    """
+    Caps in-flight requests at ``max_concurrency``, letting at most
+    ``max_queue`` more wait up to ``queue_timeout`` seconds for a slot.
+    """
+
+    def __init__(self, max_concurrency: int, max_queue: int, queue_timeout: float):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        self.waiting = 0
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def acquire(self) -> bool:
+        if not self._semaphore.locked():
+            # a free slot is taken without yielding to the event loop, so a
+            # burst of requests sees the slots fill up one by one
+            await self._semaphore.acquire()
+            self.in_flight += 1
+            return True
+        if self.waiting >= self.max_queue:
+            return False
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            self.waiting -= 1
+        self.in_flight += 1
+        return True
+
+    def release(self) -> None:
+        self.in_flight -= 1
+        self._semaphore.release()
+
+
+class AdmissionController:
+    """
+    Shared admission state for a set of routes. Pass it to
+    ``CollectionsAPIRouter(admission=...)`` to guard every route of the router.
+
+    ``rate``/``burst`` configure each client's token bucket (``rate=None``
+    disables rate limiting). ``max_concurrency`` caps each route and defaults to
+    half of the database pool, so a single hot route cannot exhaust it.
+    ``max_total_concurrency`` caps all routes together and defaults to the whole
+    pool, so requests spread over many routes cannot exhaust it either.
+    """
+
+    def __init__(
+        self,
+        rate: Optional[float] = DEFAULT_RATE,
+        burst: int = DEFAULT_BURST,
+        max_concurrency: Optional[int] = None,
+        max_total_concurrency: Optional[int] = None,
+        max_queue: int = DEFAULT_MAX_QUEUE,
+        queue_timeout: float = DEFAULT_QUEUE_TIMEOUT,
+        client_key: Callable[[Request], str] = client_host,
+        max_clients: int = DEFAULT_MAX_CLIENTS,
+    ):
+        self.rate = rate
+        self.burst = burst
+        self.max_concurrency = max_concurrency or max(1, pool_capacity() // 2)
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.client_key = client_key
+        self.max_clients = max_clients
+        self.max_total_concurrency = max_total_concurrency or pool_capacity()
+        self.counters = {"admitted": 0, "rate_limited": 0, "shed": 0}
+        self._buckets: Dict[str, TokenBucket] = OrderedDict()
+        self._buckets_lock = threading.Lock()
+        self._limiters: Dict[str, ConcurrencyLimiter] = {}
+        self.total = ConcurrencyLimiter(
+            self.max_total_concurrency, max_queue, queue_timeout
+        )
+
+    def limiter(self, route: str) -> ConcurrencyLimiter:
+        if route not in self._limiters:
+            self._limiters[route] = ConcurrencyLimiter(
+                self.max_concurrency, self.max_queue, self.queue_timeout
+            )
+        return self._limiters[route]
+
+    def _check_rate(self, request: Request) -> None:
+        if self.rate is None:
+            return
+        key = self.client_key(request)
+        with self._buckets_lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = TokenBucket(self.rate, self.burst)
+                # forget the least recently seen clients
+                while len(self._buckets) > self.max_clients:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+            retry_after = bucket.take()
+        if retry_after:
+            self.counters["rate_limited"] += 1
+            raise HTTPException(
+                status_code=429,
+                detail="Rate limit exceeded",
+                headers={"Retry-After": str(math.ceil(retry_after))},
+            )
+
+    def _shed(self) -> None:
+        self.counters["shed"] += 1
+        raise HTTPException(
+            status_code=503,
+            detail="Server is busy",
+            headers={"Retry-After": str(math.ceil(self.queue_timeout))},
+        )
+
+    def dependency(self, route: str):
+        limiter = self.limiter(route)
+
+        async def admit(request: Request):
+            self._check_rate(request)
+            if not await limiter.acquire():
+                self._shed()
+            if not await self.total.acquire():
+                limiter.release()
+                self._shed()
+            self.counters["admitted"] += 1
+            try:
+                yield
+            finally:
+                self.total.release()
+                limiter.release()
+
+        return Depends(admit)
+
+    def stats(self) -> dict:
+        return {
+            **self.counters,
+            "clients": len(self._buckets),
+            "total": self._limiter_stats(self.total),
+            "routes": {
+                route: self._limiter_stats(limiter)
+                for route, limiter in self._limiters.items()
+            },
+        }
+
+    @staticmethod
+    def _limiter_stats(limiter: ConcurrencyLimiter) -> dict:
+        return {
+            "in_flight": limiter.in_flight,
+            "waiting": limiter.waiting,
+            "max_concurrency": limiter.max_concurrency,
+        }
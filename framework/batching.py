@@ -0,0 +1,114 @@
+"""
+Group commit for single-row creates: concurrent inserts into the same
+collection are coalesced into one transaction so they share a single commit.
+"""
+import asyncio
+from typing import List, Tuple, Union
+
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.exc import DataError, IntegrityError
+from sqlmodel import Session
+
+from .model import BaseModel
+
+DEFAULT_GROUP_COMMIT_DELAY = 0.005
+DEFAULT_GROUP_COMMIT_SIZE = 64
+
+Outcome = Union[BaseModel, Exception]
+
+
+class _Batch:
+    def __init__(self):
+        self.items: List[Tuple[dict, asyncio.Future]] = []
+        self.full = asyncio.Event()
+
+
+class GroupCommitter:
+    """
+    Collects creates for ``collection`` over a window of at most ``max_delay``
+    seconds or ``max_size`` rows and writes them in one transaction.
+
+    The first caller of a window leads it: once the window closes it writes the
+    whole batch with its own session. Every caller still receives its own row,
+    or its own error when that row cannot be inserted.
+    """
+
+    def __init__(
+        self,
+        collection: BaseModel,
+        max_delay: float = DEFAULT_GROUP_COMMIT_DELAY,
+        max_size: int = DEFAULT_GROUP_COMMIT_SIZE,
+    ):
+        self.collection = collection
+        self.max_delay = max_delay
+        self.max_size = max_size
+        self._batch: _Batch = None
+
+    async def submit(self, db: Session, values: dict) -> BaseModel:
+        future = asyncio.get_running_loop().create_future()
+        batch = self._batch
+        if batch is None:
+            batch = self._batch = _Batch()
+        batch.items.append((values, future))
+        if len(batch.items) >= self.max_size:
+            # close the batch right away so later callers start a new one
+            self._batch = None
+            batch.full.set()
+        if len(batch.items) == 1:
+            try:
+                await asyncio.wait_for(batch.full.wait(), self.max_delay)
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                # flush even if the leading request is cancelled, so the rest of
+                # the batch is not left waiting
+                if self._batch is batch:
+                    self._batch = None
+                # the write blocks on the connection pool, so keep it off the loop
+                outcomes = await run_in_threadpool(
+                    self._commit, db, [values for values, _ in batch.items]
+                )
+                for (_, pending), outcome in zip(batch.items, outcomes):
+                    if isinstance(outcome, Exception):
+                        pending.set_exception(outcome)
+                    else:
+                        pending.set_result(outcome)
+        return await future
+
+    def _commit(self, db: Session, batch: List[dict]) -> List[Outcome]:
+        resources = [self.collection(**values) for values in batch]
+        try:
+            db.add_all(resources)
+            db.flush()
+            # detach before committing so the rows are not expired and reloaded
+            for resource in resources:
+                db.expunge(resource)
+            db.commit()
+        except (IntegrityError, DataError):
+            db.rollback()
+            return self._commit_each(db, batch)
+        except Exception as e:
+            db.rollback()
+            return [e] * len(batch)
+        return resources
+
+    def _commit_each(self, db: Session, batch: List[dict]) -> List[Outcome]:
+        # one bad row failed the batch, so isolate it by writing rows one at a time
+        outcomes = []
+        for values in batch:
+            resource = self.collection(**values)
+            try:
+                db.add(resource)
+                db.flush()
+                db.expunge(resource)
+                db.commit()
+            except (IntegrityError, DataError) as e:
+                db.rollback()
+                outcomes.append(HTTPException(status_code=422, detail=str(e)))
+            except Exception as e:
+                db.rollback()
+                outcomes.append(e)
+            else:
+                outcomes.append(resource)
+        return outcomes
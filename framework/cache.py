@@ -0,0 +1,88 @@
+"""
+In-process caching for responses assembled from several collections, keyed on
+the collections' latest ``updated_at`` so entries expire as soon as any of the
+underlying rows change, plus the ``ETag`` helpers used to revalidate them.
+"""
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable, Iterable, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlmodel import Session
+
+from .model import BaseModel
+
+
+def weak_etag(value: str) -> str:
+    """
+    Returns a weak ``ETag`` for ``value``. Weak validators stay valid across the
+    gzip, brotli and identity encodings of the same body.
+    """
+    return f'W/"{value}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Checks an ``If-None-Match`` header against ``etag`` with the weak comparison
+    RFC 9110 prescribes for it: ``*`` matches, lists are allowed, and ``W/``
+    prefixes are ignored on both sides.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+def collections_version(db: Session, collections: Iterable[BaseModel]) -> Tuple:
+    """
+    Returns the latest ``updated_at`` of each collection, fetched in one query.
+
+    This runs on every request, cache hits included, so it relies on the index
+    on ``updated_at`` to stay an index lookup per table. ``create_all`` does not
+    add indexes to tables that already exist, so older databases need
+    ``CREATE INDEX ix_<table>_updated_at ON <table> (updated_at)`` to get it.
+    """
+    columns = [
+        select(func.max(collection.updated_at)).scalar_subquery()
+        for collection in collections
+    ]
+    return tuple(db.query(*columns).one())
+
+
+class VersionedCache:
+    """
+    Thread-safe LRU cache whose entries are only returned for the version they
+    were stored with.
+    """
+
+    def __init__(self, maxsize: int = 128):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, version: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != version:
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key: Hashable, version: Hashable, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (version, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
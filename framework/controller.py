@@ -1,31 +1,71 @@
 import inspect
 from datetime import datetime
-from typing import Callable, Iterable, List
+from typing import Callable, Iterable, List, Tuple
 
-from fastapi import Depends, HTTPException
+from fastapi import Depends, HTTPException, Request, Response
 from fastapi.routing import APIRouter
 from inflection import dasherize, pluralize, singularize
+from pydantic import BaseModel as PydanticBaseModel
+from sqlalchemy import func
 from sqlalchemy.exc import DataError, IntegrityError
 from sqlmodel import Session
 
+from .admission import AdmissionController
+from .batching import (
+    DEFAULT_GROUP_COMMIT_DELAY,
+    DEFAULT_GROUP_COMMIT_SIZE,
+    GroupCommitter,
+)
+from .database import approximate_count, releasing
 from .database import get_db as default_get_db
+from .encoding import (
+    MSGPACK_MEDIA_TYPE,
+    JSONStreamingResponse,
+    MsgPackStreamingResponse,
+    accepts_msgpack,
+    response_encoder,
+)
 from .model import BaseModel
 
 
+class CountResponse(PydanticBaseModel):
+    count: int
+    approximate: bool = False
+
+
 class CollectionsAPIRouter(APIRouter):
     def __init__(
         self,
         collections: Iterable[BaseModel] = [],
         get_db: Callable = None,
         *args,
+        group_commit: bool = False,
+        group_commit_delay: float = DEFAULT_GROUP_COMMIT_DELAY,
+        group_commit_size: int = DEFAULT_GROUP_COMMIT_SIZE,
+        admission: AdmissionController = None,
         **kwargs,
     ):
+        self.admission = admission
         super().__init__(*args, **kwargs)
         self.collections = set()
         self.get_db = get_db or Depends(default_get_db)
+        # opt-in: coalesce concurrent creates per collection into one transaction
+        self.group_commit = group_commit
+        self.group_commit_delay = group_commit_delay
+        self.group_commit_size = group_commit_size
         for collection in collections:
             self.add_collection(collection)
 
+    def add_api_route(self, path: str, endpoint: Callable, **kwargs):
+        if self.admission is not None:
+            methods = kwargs.get("methods") or ["GET"]
+            route = f"{','.join(sorted(methods))} {self.prefix}{path}"
+            kwargs["dependencies"] = [
+                *(kwargs.get("dependencies") or []),
+                self.admission.dependency(route),
+            ]
+        super().add_api_route(path, endpoint, **kwargs)
+
     def add_collection(self, collection: BaseModel):
         if collection in self.collections:
             raise ValueError(f"Collection {collection} already added.")
@@ -38,11 +78,32 @@ class CollectionsAPIRouter(APIRouter):
             self._collection_get(collection),
             methods=["GET"],
             response_model=List[collection],
+            responses={200: {"content": {MSGPACK_MEDIA_TYPE: {}}}},
             status_code=200,
             summary=f"Get all {plural_name}",
             description=f"Get all {plural_name}",
             tags=[collection_name],
         )
+        self.add_api_route(
+            f"/{collection_name}/",
+            self._collection_exists(collection),
+            methods=["HEAD"],
+            status_code=200,
+            summary=f"Check for any {plural_name}",
+            description=f"Check whether any {plural_name} match the given filters",
+            tags=[collection_name],
+        )
+        # registered ahead of the ``{id_}`` routes so ``_count`` is not parsed as an id
+        self.add_api_route(
+            f"/{collection_name}/_count",
+            self._collection_count(collection),
+            methods=["GET"],
+            response_model=CountResponse,
+            status_code=200,
+            summary=f"Count {plural_name}",
+            description=f"Count {plural_name} matching the given filters",
+            tags=[collection_name],
+        )
         self.add_api_route(
             f"/{collection_name}/{{id_}}",
             self._collection_get_one(collection),
@@ -53,6 +114,15 @@ class CollectionsAPIRouter(APIRouter):
             description=f"Get {single_name} by id",
             tags=[collection_name],
         )
+        self.add_api_route(
+            f"/{collection_name}/{{id_}}",
+            self._collection_exists_one(collection),
+            methods=["HEAD"],
+            status_code=200,
+            summary=f"Check {single_name} exists at id",
+            description=f"Check {single_name} exists at id",
+            tags=[collection_name],
+        )
         self.add_api_route(
             f"/{collection_name}/",
             self._collection_create(collection),
@@ -93,9 +163,9 @@ class CollectionsAPIRouter(APIRouter):
             tags=[collection_name],
         )
 
-    def _collection_get(self, collection: BaseModel):
+    def _filter_parameters(self, collection: BaseModel) -> List[inspect.Parameter]:
         arg_dict = {name: field.type_ for name, field in collection.__fields__.items()}
-        params = [
+        return [
             inspect.Parameter(
                 name,
                 inspect.Parameter.POSITIONAL_OR_KEYWORD,
@@ -104,6 +174,31 @@ class CollectionsAPIRouter(APIRouter):
             )
             for name in arg_dict
         ]
+
+    @staticmethod
+    def _filter_clauses(collection: BaseModel, filters: dict) -> list:
+        clauses = []
+        if filters:
+            for key in dict.keys(filters):
+                val = dict.get(filters, key, None)
+                if (
+                    key in collection.__fields__
+                    and key not in collection.__exclude_fields__
+                    and val is not None
+                ):
+                    clauses.append(getattr(collection, key) == val)
+        clauses.append(collection.deleted_at == None)
+        return clauses
+
+    def _collection_get(self, collection: BaseModel):
+        params = [
+            inspect.Parameter(
+                "request",
+                inspect.Parameter.POSITIONAL_OR_KEYWORD,
+                annotation=Request,
+            ),
+        ]
+        params.extend(self._filter_parameters(collection))
         params.append(
             inspect.Parameter(
                 "db",
@@ -113,29 +208,93 @@ class CollectionsAPIRouter(APIRouter):
             )
         )
         sig = inspect.Signature(parameters=params)
+        encode = response_encoder(collection)
 
-        async def _base_get_resource(db: Session = self.get_db, **filters):
-            query = db.query(collection)
-            if filters:
-                for key in dict.keys(filters):
-                    val = dict.get(filters, key, None)
-                    if (
-                        key in collection.__fields__
-                        and key not in collection.__exclude_fields__
-                        and val is not None
-                    ):
-                        query = query.filter(getattr(collection, key) == val)
-            query = query.filter(collection.deleted_at == None)
+        def _base_get_resource(request: Request, db: Session = self.get_db, **filters):
+            query = db.query(collection).filter(
+                *self._filter_clauses(collection, filters)
+            )
             collection_results = query.all()
-            return collection_results
+            response_class = JSONStreamingResponse
+            if accepts_msgpack(request):
+                response_class = MsgPackStreamingResponse
+            return response_class(
+                collection_results, encode=encode, headers={"Vary": "Accept"}
+            )
 
         _base_get_resource.__signature__ = sig
         _base_get_resource.__name__ = f"get_{collection.__tablename__}"
 
-        return _base_get_resource
+        return releasing(_base_get_resource)
+
+    def _collection_count(self, collection: BaseModel):
+        params = self._filter_parameters(collection)
+        params.extend(
+            [
+                inspect.Parameter(
+                    "approximate",
+                    inspect.Parameter.POSITIONAL_OR_KEYWORD,
+                    annotation=bool,
+                    default=False,
+                ),
+                inspect.Parameter(
+                    "db",
+                    inspect.Parameter.POSITIONAL_OR_KEYWORD,
+                    annotation=Session,
+                    default=self.get_db,
+                ),
+            ]
+        )
+        sig = inspect.Signature(parameters=params)
+
+        def _base_count_resource(
+            db: Session = self.get_db, approximate: bool = False, **filters
+        ):
+            # estimates come from planner statistics, which know nothing about
+            # filters or soft deletes, so only use them for the bare collection
+            if approximate and not any(val is not None for val in filters.values()):
+                estimate = approximate_count(db, collection.__tablename__)
+                if estimate is not None:
+                    return CountResponse(count=estimate, approximate=True)
+            count = (
+                db.query(func.count(collection.id))
+                .filter(*self._filter_clauses(collection, filters))
+                .scalar()
+            )
+            return CountResponse(count=count, approximate=False)
+
+        _base_count_resource.__signature__ = sig
+        _base_count_resource.__name__ = f"count_{collection.__tablename__}"
+
+        return releasing(_base_count_resource)
+
+    def _collection_exists(self, collection: BaseModel):
+        params = self._filter_parameters(collection)
+        params.append(
+            inspect.Parameter(
+                "db",
+                inspect.Parameter.POSITIONAL_OR_KEYWORD,
+                annotation=Session,
+                default=self.get_db,
+            )
+        )
+        sig = inspect.Signature(parameters=params)
+
+        def _base_exists_resource(db: Session = self.get_db, **filters):
+            query = db.query(collection.id).filter(
+                *self._filter_clauses(collection, filters)
+            )
+            if db.query(query.exists()).scalar():
+                return Response(status_code=200)
+            return Response(status_code=404)
+
+        _base_exists_resource.__signature__ = sig
+        _base_exists_resource.__name__ = f"exists_{collection.__tablename__}"
+
+        return releasing(_base_exists_resource)
 
     def _collection_get_one(self, collection: BaseModel):
-        async def get_resource(id_: int, db: Session = self.get_db):
+        def get_resource(id_: int, db: Session = self.get_db):
             resource = db.get(collection, id_)
             if resource.deleted_at is not None:
                 raise HTTPException(
@@ -145,7 +304,20 @@ class CollectionsAPIRouter(APIRouter):
 
         get_resource.__name__ = f"get_{collection.__tablename__}_by_id"
 
-        return get_resource
+        return releasing(get_resource)
+
+    def _collection_exists_one(self, collection: BaseModel):
+        def exists_resource(id_: int, db: Session = self.get_db):
+            query = db.query(collection.id).filter(
+                collection.id == id_, collection.deleted_at == None
+            )
+            if db.query(query.exists()).scalar():
+                return Response(status_code=200)
+            return Response(status_code=404)
+
+        exists_resource.__name__ = f"exists_{collection.__tablename__}_by_id"
+
+        return releasing(exists_resource)
 
     def _collection_create(self, collection: BaseModel):
         params = [
@@ -162,8 +334,15 @@ class CollectionsAPIRouter(APIRouter):
             ),
         ]
         sig = inspect.Signature(parameters=params)
+        committer = None
+        if self.group_commit:
+            committer = GroupCommitter(
+                collection,
+                max_delay=self.group_commit_delay,
+                max_size=self.group_commit_size,
+            )
 
-        async def _base_create_resource(**kwargs):
+        def _resource_values(kwargs: dict) -> Tuple[Session, dict]:
             # put controls on the function the old fashioned way
             if len(kwargs) > 2:
                 raise ValueError(
@@ -173,11 +352,28 @@ class CollectionsAPIRouter(APIRouter):
             # this makes saves work
             resource_values = list(dict.values(kwargs))[0].dict()
             resource_values["created_at"] = datetime.now()
-            resource = collection(**resource_values)
-            db.add(resource)
-            db.commit()
-            db.refresh(resource)
-            return resource
+            return db, resource_values
+
+        if committer is not None:
+            # batching needs the event loop; the commit itself runs in a thread
+            async def _base_create_resource(**kwargs):
+                db, resource_values = _resource_values(kwargs)
+                return await committer.submit(db, resource_values)
+
+        else:
+
+            @releasing
+            def _base_create_resource(**kwargs):
+                db, resource_values = _resource_values(kwargs)
+                resource = collection(**resource_values)
+                db.add(resource)
+                try:
+                    db.commit()
+                except (IntegrityError, DataError) as e:
+                    db.rollback()
+                    raise HTTPException(status_code=422, detail=str(e))
+                db.refresh(resource)
+                return resource
 
         _base_create_resource.__signature__ = sig
         _base_create_resource.__name__ = f"create_{collection.__tablename__}"
@@ -203,7 +399,7 @@ class CollectionsAPIRouter(APIRouter):
         ]
         sig = inspect.Signature(parameters=params)
 
-        async def _base_update_resource(**kwargs):
+        def _base_update_resource(**kwargs):
             # put controls on the function the old fashioned way
             if len(kwargs) > 3:
                 raise ValueError(
@@ -225,6 +421,7 @@ class CollectionsAPIRouter(APIRouter):
                 for key, value in resource_values.items():
                     if value is not None:
                         setattr(existing_resource, key, value)
+                existing_resource.updated_at = datetime.now()
                 db.add(existing_resource)
                 try:
                     db.commit()
@@ -240,13 +437,14 @@ class CollectionsAPIRouter(APIRouter):
         _base_update_resource.__signature__ = sig
         _base_update_resource.__name__ = f"update_{collection.__tablename__}"
 
-        return _base_update_resource
+        return releasing(_base_update_resource)
 
     def _collection_delete(self, collection: BaseModel):
-        async def delete_resource(id_: int, db: Session = self.get_db):
+        def delete_resource(id_: int, db: Session = self.get_db):
             resource = db.get(collection, id_)
             if resource:
                 resource.deleted_at = datetime.utcnow()
+                resource.updated_at = datetime.now()
                 db.add(resource)
                 db.commit()
                 return {"message": f"{collection} soft deleted"}
@@ -257,4 +455,4 @@ class CollectionsAPIRouter(APIRouter):
 
         delete_resource.__name__ = f"delete_{collection.__tablename__}"
 
-        return delete_resource
+        return releasing(delete_resource)
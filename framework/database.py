@@ -2,26 +2,243 @@
 Manages the database connections and interactions so that they can be imported
 consistently across the application.
 """
+import functools
 import os
+import threading
+from typing import Callable, Dict, Optional
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.pool import QueuePool
+from sqlalchemy.sql import Select
+from sqlalchemy.sql.elements import TextClause
 from sqlmodel import SQLModel, Session, create_engine
 
 DB_URL = os.getenv("FAILSAFE_DB_URL", "sqlite:///db.sqlite3")
 # DB_URL = os.getenv("FAILSAFE_DB_URL")
 
+DB_POOL_SIZE = int(os.getenv("FAILSAFE_DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("FAILSAFE_DB_MAX_OVERFLOW", "10"))
 
+# ``production`` tunes file-backed SQLite databases for concurrent use, ``none``
+# keeps SQLite's defaults
+SQLITE_PROFILE = os.getenv("FAILSAFE_SQLITE_PROFILE", "none")
+SQLITE_READ_POOL_SIZE = int(os.getenv("FAILSAFE_SQLITE_READ_POOL_SIZE", "8"))
+SQLITE_WRITE_TIMEOUT = float(os.getenv("FAILSAFE_SQLITE_WRITE_TIMEOUT", "30"))
+SQLITE_PRAGMAS = {
+    "synchronous": "NORMAL",
+    "mmap_size": 256 * 1024 * 1024,
+    "cache_size": -64 * 1024,  # negative values are KiB
+    "busy_timeout": 5000,
+}
+SQLITE_WRITER_PRAGMAS = {"journal_mode": "WAL", **SQLITE_PRAGMAS}
+# reads are routed away from the writer, so enforce that they stay reads
+SQLITE_READER_PRAGMAS = {**SQLITE_PRAGMAS, "query_only": "ON"}
+
+_session_factories: Dict[str, Callable[[], Session]] = {}
+_session_factories_lock = threading.Lock()
+
+
+class SQLiteRoutingSession(Session):
+    """
+    Session sending writes to a single writer connection and plain reads to a
+    pool of read connections. With WAL enabled, readers never block the writer,
+    and writers queue on the writer pool instead of colliding into "database is
+    locked". Once a transaction has written, every statement in it goes to the
+    writer so the session reads its own uncommitted changes.
+    """
+
+    def __init__(self, writer: Engine, reader: Engine, **kwargs):
+        super().__init__(bind=writer, **kwargs)
+        self.writer = writer
+        self.reader = reader
+        self._writing = False
+        event.listen(self, "after_transaction_end", self._end_writing)
+
+    def _end_writing(self, session, transaction):
+        if transaction.parent is None:
+            self._writing = False
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if (
+            self._writing
+            or self._flushing
+            or self.new
+            or self.deleted
+            or self.dirty
+            or not _is_plain_read(clause)
+        ):
+            self._writing = True
+            return self.writer
+        return self.reader
+
+
+def _is_plain_read(clause) -> bool:
+    if clause is None or isinstance(clause, Select):
+        return True
+    if isinstance(clause, TextClause):
+        return clause.text.lstrip().upper().startswith("SELECT")
+    return False
+
+
+def _set_pragmas(engine: Engine, pragmas: dict):
+    @event.listens_for(engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+
+def _is_file_sqlite(url: str) -> bool:
+    url = make_url(url)
+    return url.get_backend_name() == "sqlite" and url.database not in (
+        None,
+        "",
+        ":memory:",
+    )
+
+
+def create_session_factory(
+    url: str, sqlite_profile: str = SQLITE_PROFILE
+) -> Callable[[], Session]:
+    """
+    Creates the engine(s) for ``url``, makes sure the tables exist, and returns a
+    callable opening new sessions against them.
+    """
+    session_kwargs = {"autoflush": True, "autocommit": False}
+    if _is_file_sqlite(url) and sqlite_profile == "production":
+        connect_args = {"check_same_thread": False}
+        writer = create_engine(
+            url,
+            connect_args=connect_args,
+            poolclass=QueuePool,
+            pool_size=1,
+            max_overflow=0,
+            pool_timeout=SQLITE_WRITE_TIMEOUT,
+        )
+        _set_pragmas(writer, SQLITE_WRITER_PRAGMAS)
+        # the writer connects first so the database is in WAL mode for readers
+        SQLModel.metadata.create_all(writer, checkfirst=True)
+        reader = create_engine(
+            url,
+            connect_args=connect_args,
+            poolclass=QueuePool,
+            pool_size=SQLITE_READ_POOL_SIZE,
+            max_overflow=0,
+        )
+        _set_pragmas(reader, SQLITE_READER_PRAGMAS)
+        return lambda: SQLiteRoutingSession(writer, reader, **session_kwargs)
 
-def get_db():
     connect_args = {}
+    engine_kwargs = {}
     # Handle DB-specific connection args
-    if DB_URL.startswith("sqlite"):
+    if url.startswith("sqlite"):
         connect_args["check_same_thread"] = False
-    engine = create_engine(DB_URL, connect_args=connect_args)
-    try:
-        SQLModel.metadata.create_all(engine, checkfirst=True)
-    except:
-        raise  # Database already exists
+    else:
+        engine_kwargs["pool_size"] = DB_POOL_SIZE
+        engine_kwargs["max_overflow"] = DB_MAX_OVERFLOW
+    engine = create_engine(url, connect_args=connect_args, **engine_kwargs)
+    SQLModel.metadata.create_all(engine, checkfirst=True)
+    return lambda: Session(engine, **session_kwargs)
+
+
+def get_session_factory(url: str = None) -> Callable[[], Session]:
+    """
+    Returns the session factory for ``url``, creating its engines on first use
+    so connection pools are shared across requests.
+    """
+    url = url or DB_URL
+    with _session_factories_lock:
+        if url not in _session_factories:
+            _session_factories[url] = create_session_factory(url)
+        return _session_factories[url]
+
+
+def pool_capacity(url: str = None) -> int:
+    """
+    Returns how many connections requests against ``url`` can hold at once.
+    """
+    url = url or DB_URL
+    if _is_file_sqlite(url) and SQLITE_PROFILE == "production":
+        return SQLITE_READ_POOL_SIZE
+    return DB_POOL_SIZE + DB_MAX_OVERFLOW
+
+
+def get_db():
+    session = get_session_factory()()
     try:
-        with Session(engine, autoflush=True, autocommit=False) as session:
-            yield session
+        yield session
     finally:
         session.close()
+
+
+def releasing(endpoint: Callable) -> Callable:
+    """
+    Wraps a synchronous endpoint taking a ``db`` session so that the session is
+    closed as soon as the endpoint returns or raises. ``get_db`` only closes it
+    once the response has been sent, and until then its connection is unavailable
+    to requests waiting on the pool.
+    """
+
+    @functools.wraps(endpoint)
+    def wrapper(*args, **kwargs):
+        try:
+            return endpoint(*args, **kwargs)
+        finally:
+            db = kwargs.get("db")
+            if db is not None:
+                db.close()
+
+    return wrapper
+
+
+def approximate_count(db: Session, table_name: str) -> Optional[int]:
+    """
+    Returns the row count the database keeps in its planner statistics for
+    ``table_name``, or ``None`` when no estimate is available (e.g. the table has
+    never been analyzed). Estimates include soft-deleted rows.
+    """
+    bind = db.get_bind()
+    dialect = bind.dialect.name
+    if dialect == "postgresql":
+        estimate = db.execute(
+            text("SELECT reltuples FROM pg_class WHERE oid = to_regclass(:table)"),
+            {"table": table_name},
+        ).scalar()
+    elif dialect == "sqlite":
+        # ask through the session so the check reuses its connection
+        analyzed = db.execute(
+            text(
+                "SELECT 1 FROM sqlite_master "
+                "WHERE type = 'table' AND name = 'sqlite_stat1'"
+            )
+        ).scalar()
+        if not analyzed:
+            return None
+        stat = db.execute(
+            text("SELECT stat FROM sqlite_stat1 WHERE tbl = :table AND idx IS NULL"),
+            {"table": table_name},
+        ).scalar()
+        if stat is None:
+            # tables with indexes only get per-index rows; the first number is
+            # still the row count of the table
+            stat = db.execute(
+                text("SELECT stat FROM sqlite_stat1 WHERE tbl = :table LIMIT 1"),
+                {"table": table_name},
+            ).scalar()
+        estimate = int(stat.split()[0]) if stat else None
+    elif dialect == "mysql":
+        estimate = db.execute(
+            text(
+                "SELECT table_rows FROM information_schema.tables "
+                "WHERE table_schema = DATABASE() AND table_name = :table"
+            ),
+            {"table": table_name},
+        ).scalar()
+    else:
+        return None
+    # postgres reports -1 for tables that have never been vacuumed or analyzed
+    if estimate is None or estimate < 0:
+        return None
+    return int(estimate)
@@ -0,0 +1,329 @@
+"""
+Negotiates response encodings (JSON, MessagePack) and content compression
+(gzip, brotli) from the request headers. Collection responses are encoded item
+by item and sent in chunks, so the encoded body is never built in full; the
+rows themselves are loaded beforehand so the database connection is released
+before the response is sent.
+"""
+import functools
+import json
+import zlib
+from typing import Any, Callable, Dict, Iterable, Optional, Sequence
+
+from fastapi import Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.utils import create_cloned_field, create_response_field
+from pydantic import ValidationError
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import StreamingResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional dependency
+    msgpack = None
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+MSGPACK_MEDIA_TYPES = (MSGPACK_MEDIA_TYPE, "application/x-msgpack")
+STREAM_CHUNK_SIZE = 64 * 1024
+DEFAULT_MINIMUM_SIZE = 500
+
+
+def parse_quality_header(value: str) -> Dict[str, float]:
+    """
+    Parses an ``Accept``-style header into a mapping of token to quality value.
+    """
+    qualities = {}
+    for item in value.split(","):
+        token, *params = [part.strip() for part in item.split(";")]
+        if not token:
+            continue
+        quality = 1.0
+        for param in params:
+            name, _, param_value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    quality = float(param_value)
+                except ValueError:
+                    quality = 0.0
+        qualities[token.lower()] = quality
+    return qualities
+
+
+def accepts_msgpack(request: Request) -> bool:
+    """
+    Returns ``True`` when the client prefers MessagePack over JSON and the
+    ``msgpack`` package is installed.
+    """
+    if msgpack is None:
+        return False
+    accept = parse_quality_header(request.headers.get("accept", ""))
+    msgpack_quality = max(
+        accept.get(media_type, 0.0) for media_type in MSGPACK_MEDIA_TYPES
+    )
+    json_quality = max(
+        accept.get("application/json", 0.0),
+        accept.get("application/*", 0.0),
+        accept.get("*/*", 0.0),
+    )
+    return msgpack_quality > 0 and msgpack_quality >= json_quality
+
+
+def response_encoder(model: Any) -> Callable[[Any], Any]:
+    """
+    Returns a function serializing one item the way FastAPI serializes a
+    response declared with ``response_model=model``, so every encoding of a
+    collection exposes the same fields.
+    """
+    field = create_cloned_field(
+        create_response_field(name=f"Response_{model.__name__}", type_=model)
+    )
+
+    def encode(item: Any) -> Any:
+        value, errors = field.validate(item, {}, loc=("response",))
+        if errors:
+            raise ValidationError(
+                errors if isinstance(errors, list) else [errors], field.type_
+            )
+        return jsonable_encoder(value)
+
+    return encode
+
+
+def _chunked(
+    generate: Callable[..., Iterable[bytes]]
+) -> Callable[..., Iterable[bytes]]:
+    # batch small parts so compressors and the transport see reasonably sized chunks
+    @functools.wraps(generate)
+    def wrapper(*args, **kwargs) -> Iterable[bytes]:
+        chunk = bytearray()
+        for part in generate(*args, **kwargs):
+            chunk += part
+            if len(chunk) >= STREAM_CHUNK_SIZE:
+                yield bytes(chunk)
+                chunk.clear()
+        if chunk:
+            yield bytes(chunk)
+
+    return wrapper
+
+
+class JSONStreamingResponse(StreamingResponse):
+    """
+    Streams a sequence of resources as a JSON array in batched chunks.
+    """
+
+    media_type = "application/json"
+
+    def __init__(
+        self,
+        items: Iterable,
+        encode: Callable[[Any], Any] = jsonable_encoder,
+        **kwargs,
+    ):
+        kwargs.setdefault("media_type", self.media_type)
+        super().__init__(self._encode(items, encode), **kwargs)
+
+    @staticmethod
+    @_chunked
+    def _encode(items: Iterable, encode: Callable[[Any], Any]) -> Iterable[bytes]:
+        separator = b"["
+        for item in items:
+            # the same settings as starlette's JSONResponse
+            yield separator + json.dumps(
+                encode(item),
+                ensure_ascii=False,
+                allow_nan=False,
+                indent=None,
+                separators=(",", ":"),
+            ).encode("utf-8")
+            separator = b","
+        yield b"[]" if separator == b"[" else b"]"
+
+
+class MsgPackStreamingResponse(StreamingResponse):
+    """
+    Streams a sequence of resources as a MessagePack array in batched chunks.
+    """
+
+    media_type = MSGPACK_MEDIA_TYPE
+
+    def __init__(
+        self,
+        items: Sequence,
+        encode: Callable[[Any], Any] = jsonable_encoder,
+        **kwargs,
+    ):
+        kwargs.setdefault("media_type", self.media_type)
+        super().__init__(self._encode(items, encode), **kwargs)
+
+    @staticmethod
+    @_chunked
+    def _encode(items: Sequence, encode: Callable[[Any], Any]) -> Iterable[bytes]:
+        packer = msgpack.Packer()
+        # the array header needs the length up front
+        yield packer.pack_array_header(len(items))
+        for item in items:
+            yield packer.pack(encode(item))
+
+
+class GzipCompressor:
+    encoding = "gzip"
+
+    def __init__(self, level: int = 6):
+        # wbits=31 writes the gzip header and trailer around the deflate stream
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+class BrotliCompressor:
+    encoding = "br"
+
+    def __init__(self, quality: int = 4):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """
+    Picks the best content coding the client accepts, preferring brotli over
+    gzip when both are equally acceptable and brotli is installed.
+    """
+    accepted = parse_quality_header(accept_encoding)
+    wildcard = accepted.get("*", 0.0)
+    candidates = ["br", "gzip"] if brotli is not None else ["gzip"]
+    best, best_quality = None, 0.0
+    for encoding in candidates:
+        quality = accepted.get(encoding, wildcard)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware compressing responses with the best encoding the client
+    accepts. Bodies smaller than ``minimum_size`` are sent as-is; larger and
+    streaming bodies are compressed chunk by chunk as they are produced.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = DEFAULT_MINIMUM_SIZE,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    def compressor(self, encoding: str):
+        if encoding == "br":
+            return BrotliCompressor(quality=self.brotli_quality)
+        return GzipCompressor(level=self.gzip_level)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http":
+            encoding = negotiate_encoding(
+                Headers(scope=scope).get("accept-encoding", "")
+            )
+            if encoding is not None:
+                responder = _CompressionResponder(
+                    self.app, self.compressor(encoding), self.minimum_size
+                )
+                await responder(scope, receive, send)
+                return
+        await self.app(scope, receive, send)
+
+
+class _CompressionResponder:
+    def __init__(self, app: ASGIApp, compressor, minimum_size: int):
+        self.app = app
+        self.compressor = compressor
+        self.minimum_size = minimum_size
+        self.send: Send = None
+        self.start_message: Message = None
+        self.pending = []
+        self.pending_size = 0
+        self.started = False
+        self.passthrough = False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        self.send = send
+        await self.app(scope, receive, self.send_with_compression)
+
+    async def send_with_compression(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self.start_message = message
+            headers = Headers(raw=message["headers"])
+            # leave already encoded responses alone
+            self.passthrough = "content-encoding" in headers
+            if self.passthrough:
+                await self.send(message)
+            return
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.started:
+            await self._send_compressed(body, more_body)
+            return
+
+        # hold back small chunks until we know whether the body crosses the
+        # threshold, so tiny streamed responses are not compressed either
+        self.pending.append(body)
+        self.pending_size += len(body)
+        if self.pending_size < self.minimum_size:
+            if more_body:
+                return
+            await self.send(self.start_message)
+            await self.send(
+                {"type": "http.response.body", "body": b"".join(self.pending)}
+            )
+            return
+
+        headers = MutableHeaders(raw=self.start_message["headers"])
+        headers["Content-Encoding"] = self.compressor.encoding
+        headers.add_vary_header("Accept-Encoding")
+        buffered = b"".join(self.pending)
+        self.pending = []
+        if not more_body:
+            compressed = self.compressor.compress(buffered) + self.compressor.finish()
+            headers["Content-Length"] = str(len(compressed))
+            await self.send(self.start_message)
+            await self.send({"type": "http.response.body", "body": compressed})
+            return
+        if "content-length" in headers:
+            del headers["Content-Length"]
+        await self.send(self.start_message)
+        self.started = True
+        await self._send_compressed(buffered, more_body)
+
+    async def _send_compressed(self, body: bytes, more_body: bool) -> None:
+        compressed = self.compressor.compress(body)
+        if not more_body:
+            compressed += self.compressor.finish()
+        elif not compressed:
+            return
+        await self.send(
+            {"type": "http.response.body", "body": compressed, "more_body": more_body}
+        )
@@ -30,7 +30,7 @@ class BaseModel(SQLModel, metaclass=BaseSQLModelMetaclass):
 
     id: Optional[int] = Field(default=None, primary_key=True, index=True)
     created_at: datetime = Field(default=None)
-    updated_at: Optional[datetime] = Field(default_factory=datetime.now)
+    updated_at: Optional[datetime] = Field(default_factory=datetime.now, index=True)
     deleted_at: Optional[datetime] = Field(default=None)
 
     @classmethod
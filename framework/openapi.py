@@ -0,0 +1,68 @@
+"""
+Serves the OpenAPI schema from a precomputed body instead of regenerating and
+re-serializing it on request. The schema can also be exported ahead of time and
+loaded from disk so workers skip generation entirely.
+"""
+import hashlib
+import json
+import os
+from typing import Optional
+
+from fastapi import FastAPI, Request, Response
+from starlette.routing import Route
+
+from .cache import etag_matches, weak_etag
+
+
+def render_openapi(app: FastAPI) -> bytes:
+    """
+    Serializes the OpenAPI schema of ``app`` the way FastAPI's JSON responses do.
+    """
+    return json.dumps(
+        app.openapi(),
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+def export_openapi(app: FastAPI, path: str) -> None:
+    """
+    Writes the OpenAPI schema of ``app`` to ``path``, regenerating it even if a
+    previously exported schema was loaded.
+    """
+    app.openapi_schema = None
+    with open(path, "wb") as f:
+        f.write(render_openapi(app))
+
+
+def install_openapi_cache(app: FastAPI, schema_path: Optional[str] = None) -> None:
+    """
+    Builds the OpenAPI schema of ``app`` once, or loads it from ``schema_path``
+    when that file exists, and replaces the ``openapi_url`` route with one
+    serving it with an ``ETag``. Call it after every router has been included.
+    """
+    if app.openapi_url is None:
+        return
+    if schema_path and os.path.exists(schema_path):
+        with open(schema_path, "rb") as f:
+            body = f.read()
+        # keep app.openapi() consistent with what is served
+        app.openapi_schema = json.loads(body)
+    else:
+        body = render_openapi(app)
+    etag = weak_etag(hashlib.sha256(body).hexdigest())
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+
+    async def openapi(request: Request) -> Response:
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    app.router.routes = [
+        route
+        for route in app.router.routes
+        if not (isinstance(route, Route) and route.path == app.openapi_url)
+    ]
+    app.add_route(app.openapi_url, openapi, include_in_schema=False)
@@ -1,9 +1,19 @@
+import os
+
 from fastapi import FastAPI
 
+from framework.encoding import CompressionMiddleware
+from framework.openapi import install_openapi_cache
+
+from .api import admission
+from .api.fmea import FMEARouter
 from .api.reference import ReferenceRouter
 from .api.process import ProcessRouter
 from .api.projects import ProjectsRouter
 
+# a schema exported with ``python -m src.openapi`` is served instead of generating one
+OPENAPI_PATH = os.getenv("FAILSAFE_OPENAPI_PATH")
+
 
 def get_app(app: FastAPI = None) -> FastAPI:
     """
@@ -15,6 +25,16 @@ def get_app(app: FastAPI = None) -> FastAPI:
         ReferenceRouter,
         ProjectsRouter,
         ProcessRouter,
+        FMEARouter,
     ]:
         app.include_router(router)
+    app.add_api_route(
+        "/_admission",
+        admission.stats,
+        methods=["GET"],
+        summary="Get admission control counters",
+        tags=["monitoring"],
+    )
+    app.add_middleware(CompressionMiddleware)
+    install_openapi_cache(app, schema_path=OPENAPI_PATH)
     return app
@@ -0,0 +1,16 @@
+"""
+Shared state for the API blueprints.
+"""
+import os
+
+from framework.admission import DEFAULT_BURST, AdmissionController
+
+RATE_LIMIT = os.getenv("FAILSAFE_RATE_LIMIT")
+RATE_BURST = int(os.getenv("FAILSAFE_RATE_BURST", DEFAULT_BURST))
+
+# one controller for all blueprints, so per-client rate limits span the whole API;
+# requests per second per client are only limited when FAILSAFE_RATE_LIMIT is set
+admission = AdmissionController(
+    rate=float(RATE_LIMIT) if RATE_LIMIT else None,
+    burst=RATE_BURST,
+)
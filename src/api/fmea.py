@@ -0,0 +1,167 @@
+"""
+Contains the ``fmea`` API blueprint, which serves composite read models spanning
+several collections.
+"""
+import hashlib
+import json
+from typing import List, Optional
+
+from fastapi import HTTPException, Request, Response
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel as PydanticBaseModel
+from sqlalchemy import and_
+from sqlmodel import Session
+
+from framework.cache import (
+    VersionedCache,
+    collections_version,
+    etag_matches,
+    weak_etag,
+)
+from framework.controller import CollectionsAPIRouter
+from framework.database import releasing
+
+from . import admission
+from ..models.process import Cause, Effect, Failure
+from ..models.projects import Project, ProjectTeamLink, Role, Team, User, UserTeamLink
+from ..models.reference import Detection, Impact, Likelihood, Severity
+
+PROJECT_COLLECTIONS = (Project, ProjectTeamLink, Team, UserTeamLink, User, Role)
+# failure modes and reference scales are not linked to projects, so these sections
+# are the same in every snapshot
+GLOBAL_COLLECTIONS = (Failure, Cause, Effect, Severity, Likelihood, Detection, Impact)
+SNAPSHOT_COLLECTIONS = PROJECT_COLLECTIONS + GLOBAL_COLLECTIONS
+
+
+class TeamMember(PydanticBaseModel):
+    user: User
+    role: Optional[Role] = None
+
+
+class TeamSnapshot(PydanticBaseModel):
+    team: Team
+    members: List[TeamMember]
+
+
+class ProjectSnapshot(PydanticBaseModel):
+    project: Project
+    teams: List[TeamSnapshot]
+    failures: List[Failure]
+    causes: List[Cause]
+    effects: List[Effect]
+    severities: List[Severity]
+    likelihoods: List[Likelihood]
+    detections: List[Detection]
+    impacts: List[Impact]
+
+
+FMEARouter = CollectionsAPIRouter(
+    prefix="/fmea",
+    tags=["fmea"],
+    admission=admission,
+)
+
+snapshot_cache = VersionedCache(maxsize=256)
+global_sections_cache = VersionedCache(maxsize=1)
+
+
+def _live(db: Session, collection) -> list:
+    return db.query(collection).filter(collection.deleted_at == None).all()
+
+
+def build_project_sections(db: Session, project: Project) -> dict:
+    """
+    Assembles the project and its teams and members with one query per
+    collection, regardless of how many teams and members the project has.
+    """
+    teams = (
+        db.query(Team)
+        .join(ProjectTeamLink, ProjectTeamLink.team_id == Team.id)
+        .filter(
+            ProjectTeamLink.project_id == project.id,
+            ProjectTeamLink.deleted_at == None,
+            Team.deleted_at == None,
+        )
+        # a team may be linked to the same project more than once
+        .distinct()
+        .order_by(Team.id)
+        .all()
+    )
+    members = {team.id: [] for team in teams}
+    if teams:
+        rows = (
+            db.query(UserTeamLink.team_id, User, Role)
+            .join(User, User.id == UserTeamLink.user_id)
+            .outerjoin(
+                Role, and_(Role.id == UserTeamLink.role_id, Role.deleted_at == None)
+            )
+            .filter(
+                UserTeamLink.team_id.in_(list(members)),
+                UserTeamLink.deleted_at == None,
+                User.deleted_at == None,
+            )
+            .order_by(UserTeamLink.id)
+            .all()
+        )
+        for team_id, user, role in rows:
+            members[team_id].append({"user": user, "role": role})
+    return jsonable_encoder(
+        {
+            "project": project,
+            "teams": [
+                {"team": team, "members": members[team.id]} for team in teams
+            ],
+        }
+    )
+
+
+def build_global_sections(db: Session) -> dict:
+    """
+    Assembles the failure modes and reference scales. They are global rather
+    than project-scoped, so they are cached once and shared by every snapshot.
+    """
+    return jsonable_encoder(
+        {
+            "failures": _live(db, Failure),
+            "causes": _live(db, Cause),
+            "effects": _live(db, Effect),
+            "severities": _live(db, Severity),
+            "likelihoods": _live(db, Likelihood),
+            "detections": _live(db, Detection),
+            "impacts": _live(db, Impact),
+        }
+    )
+
+
+@FMEARouter.get(
+    "/projects/{id_}",
+    response_model=ProjectSnapshot,
+    summary="Get FMEA snapshot of Project",
+    description="Get the Project with its teams, members, failure modes and reference scales",
+)
+@releasing
+def get_project_snapshot(
+    id_: int, request: Request, db: Session = FMEARouter.get_db
+):
+    version = collections_version(db, SNAPSHOT_COLLECTIONS)
+    etag = weak_etag(hashlib.sha1(repr((id_, version)).encode()).hexdigest())
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    project_version = version[: len(PROJECT_COLLECTIONS)]
+    global_version = version[len(PROJECT_COLLECTIONS) :]
+    project_body = snapshot_cache.get(id_, project_version)
+    if project_body is None:
+        project = db.get(Project, id_)
+        if project is None or project.deleted_at is not None:
+            raise HTTPException(status_code=404, detail=f"Project:{id_} not found")
+        project_body = json.dumps(build_project_sections(db, project)).encode()
+        snapshot_cache.set(id_, project_version, project_body)
+    global_body = global_sections_cache.get(None, global_version)
+    if global_body is None:
+        global_body = json.dumps(build_global_sections(db)).encode()
+        global_sections_cache.set(None, global_version, global_body)
+    # splice the two JSON objects into one
+    body = project_body[:-1] + b"," + global_body[1:]
+    return Response(
+        content=body, media_type="application/json", headers={"ETag": etag}
+    )
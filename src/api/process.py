@@ -4,11 +4,13 @@ Contains the ``process`` API blueprint.
 
 from framework.controller import CollectionsAPIRouter
 
+from . import admission
 from ..models.process import Cause, Effect, Failure
 
 ProcessRouter = CollectionsAPIRouter(
     prefix="/process",
     tags=["process"],
+    admission=admission,
 )
 
 ProcessRouter.add_collection(Failure)
@@ -4,11 +4,13 @@ Contains the ``projects`` API blueprint.
 
 from framework.controller import CollectionsAPIRouter
 
+from . import admission
 from ..models.projects import Project, Role, Team, User
 
 ProjectsRouter = CollectionsAPIRouter(
     prefix="/projects",
     tags=["projects"],
+    admission=admission,
 )
 
 ProjectsRouter.add_collection(User)
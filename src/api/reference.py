@@ -4,11 +4,13 @@ Contains the ``reference`` API blueprint.
 
 from framework.controller import CollectionsAPIRouter
 
+from . import admission
 from ..models.reference import Detection, Impact, Likelihood, Severity
 
 ReferenceRouter = CollectionsAPIRouter(
     prefix="/reference",
     tags=["reference"],
+    admission=admission,
 )
 
 ReferenceRouter.add_collection(Severity)
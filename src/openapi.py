@@ -0,0 +1,16 @@
+"""
+Exports the OpenAPI schema so it can be baked into the deployment artifact and
+served via ``FAILSAFE_OPENAPI_PATH``.
+
+Usage: ``python -m src.openapi [path]`` (defaults to ``openapi.json``).
+"""
+import sys
+
+from framework.openapi import export_openapi
+
+from . import get_app
+
+if __name__ == "__main__":
+    path = sys.argv[1] if len(sys.argv) > 1 else "openapi.json"
+    export_openapi(get_app(), path)
+    print(f"OpenAPI schema written to {path}")
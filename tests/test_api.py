@@ -1,5 +1,6 @@
 import pytest
 from fastapi import FastAPI
+from fastapi.testclient import TestClient
 
 from src import get_app
 
@@ -11,3 +12,13 @@ def test_get_app(init, test_app):
     assert app is not None
     assert isinstance(app, FastAPI)
     assert len(app.routes) > 0
+
+
+def test_admission_stats(test_app):
+    test_client = TestClient(get_app(app=test_app))
+    assert test_client.get("/process/failures/").status_code == 200
+    response = test_client.get("/_admission")
+    assert response.status_code == 200
+    content = response.json()
+    assert content["admitted"] > 0
+    assert "GET /process/failures/" in content["routes"]
@@ -0,0 +1,142 @@
+from datetime import datetime
+from typing import List
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from framework.database import get_db
+from src.api.fmea import FMEARouter
+from src.api.projects import ProjectsRouter
+from src.models.process import Failure
+from src.models.projects import Project, ProjectTeamLink, Role, Team, User, UserTeamLink
+
+
+@pytest.fixture
+def test_app_with_fmea(test_app: FastAPI) -> FastAPI:
+    test_app.include_router(ProjectsRouter)
+    test_app.include_router(FMEARouter)
+    return test_app
+
+
+def create_project(team_count: int, members_per_team: int) -> int:
+    db = next(get_db())
+    project = Project(name="Pump station", description="Coolant loop")
+    role = Role(name="Reviewer")
+    db.add_all([project, role])
+    db.commit()
+    for t in range(team_count):
+        team = Team(name=f"Team {t}")
+        db.add(team)
+        db.commit()
+        db.add(ProjectTeamLink(project_id=project.id, team_id=team.id))
+        for m in range(members_per_team):
+            user = User(name=f"User {t}.{m}", email=f"user{t}.{m}@example.com")
+            db.add(user)
+            db.commit()
+            db.add(UserTeamLink(user_id=user.id, team_id=team.id, role_id=role.id))
+        db.commit()
+    return project.id
+
+
+def count_queries(test_client: TestClient, path: str) -> int:
+    statements: List[str] = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(Engine, "before_cursor_execute", record)
+    try:
+        response = test_client.get(path)
+    finally:
+        event.remove(Engine, "before_cursor_execute", record)
+    assert response.status_code == 200
+    return len([s for s in statements if s.lstrip().upper().startswith("SELECT")])
+
+
+def test_project_snapshot(test_app_with_fmea: FastAPI):
+    test_client = TestClient(test_app_with_fmea)
+    id_ = create_project(team_count=2, members_per_team=3)
+
+    response = test_client.get(f"/fmea/projects/{id_}")
+    assert response.status_code == 200
+    content = response.json()
+    assert content["project"]["id"] == id_
+    assert "deleted_at" not in content["project"]
+    assert len(content["teams"]) == 2
+    for team in content["teams"]:
+        assert len(team["members"]) == 3
+        assert team["members"][0]["role"]["name"] == "Reviewer"
+    for key in ["failures", "causes", "effects", "severities", "impacts"]:
+        assert isinstance(content[key], list)
+
+    response = test_client.get("/fmea/projects/999999")
+    assert response.status_code == 404
+
+
+def test_project_snapshot_duplicate_team_links(test_app_with_fmea: FastAPI):
+    test_client = TestClient(test_app_with_fmea)
+    id_ = create_project(team_count=1, members_per_team=2)
+    db = next(get_db())
+    link = db.query(ProjectTeamLink).filter(ProjectTeamLink.project_id == id_).one()
+    db.add(ProjectTeamLink(project_id=id_, team_id=link.team_id))
+    db.commit()
+
+    content = test_client.get(f"/fmea/projects/{id_}").json()
+    assert len(content["teams"]) == 1
+    assert len(content["teams"][0]["members"]) == 2
+
+
+def test_project_snapshot_query_count_is_bounded(test_app_with_fmea: FastAPI):
+    test_client = TestClient(test_app_with_fmea)
+    small_id = create_project(team_count=1, members_per_team=1)
+    large_id = create_project(team_count=4, members_per_team=5)
+    # the global sections are built by whichever snapshot is requested first
+    test_client.get(f"/fmea/projects/{create_project(1, 1)}")
+
+    assert count_queries(test_client, f"/fmea/projects/{small_id}") == count_queries(
+        test_client, f"/fmea/projects/{large_id}"
+    )
+    # served from the cache, only the version check is executed
+    assert count_queries(test_client, f"/fmea/projects/{large_id}") == 1
+
+
+def test_project_snapshot_global_sections(test_app_with_fmea: FastAPI):
+    test_client = TestClient(test_app_with_fmea)
+    first_id = create_project(team_count=1, members_per_team=1)
+    second_id = create_project(team_count=1, members_per_team=1)
+    db = next(get_db())
+    db.add(Failure(name="Impeller wear", created_at=datetime.now()))
+    db.commit()
+
+    first_queries = count_queries(test_client, f"/fmea/projects/{first_id}")
+    # only the project sections are built for the second project
+    assert count_queries(test_client, f"/fmea/projects/{second_id}") < first_queries
+    for id_ in (first_id, second_id):
+        failures = test_client.get(f"/fmea/projects/{id_}").json()["failures"]
+        assert "Impeller wear" in [failure["name"] for failure in failures]
+
+
+def test_project_snapshot_cache_invalidation(test_app_with_fmea: FastAPI):
+    test_client = TestClient(test_app_with_fmea)
+    id_ = create_project(team_count=1, members_per_team=1)
+    path = f"/fmea/projects/{id_}"
+
+    response = test_client.get(path)
+    etag = response.headers["etag"]
+    response = test_client.get(path, headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    response = test_client.get(path, headers={"If-None-Match": f'"stale", {etag}'})
+    assert response.status_code == 304
+
+    team_id = test_client.get(path).json()["teams"][0]["team"]["id"]
+    response = test_client.patch(
+        f"/projects/teams/{team_id}", json={"name": "Renamed team"}
+    )
+    assert response.status_code == 200
+    response = test_client.get(path, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    assert response.json()["teams"][0]["team"]["name"] == "Renamed team"
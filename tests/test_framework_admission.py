@@ -0,0 +1,92 @@
+import asyncio
+
+import httpx
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from framework.admission import AdmissionController, ConcurrencyLimiter, TokenBucket
+from framework.controller import CollectionsAPIRouter
+from framework.database import pool_capacity
+from src.models.reference import Severity
+
+
+def test_token_bucket():
+    bucket = TokenBucket(rate=1.0, burst=2)
+    assert bucket.take() == 0
+    assert bucket.take() == 0
+    retry_after = bucket.take()
+    assert 0 < retry_after <= 1
+
+
+def test_concurrency_limiter_sheds_when_queue_is_full():
+    limiter = ConcurrencyLimiter(max_concurrency=1, max_queue=1, queue_timeout=0.05)
+
+    async def contend():
+        assert await limiter.acquire()
+        waiter = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        assert limiter.waiting == 1
+        # the queue is full, so this is rejected without waiting
+        assert not await limiter.acquire()
+        # the queued request gives up once its timeout passes
+        assert not await waiter
+        limiter.release()
+        assert await limiter.acquire()
+        limiter.release()
+
+    asyncio.run(contend())
+    assert limiter.in_flight == 0
+    assert limiter.waiting == 0
+
+
+def test_router_rate_limit(test_app: FastAPI):
+    admission = AdmissionController(rate=0.01, burst=2)
+    router = CollectionsAPIRouter([Severity], prefix="/limited", admission=admission)
+    test_app.include_router(router)
+    test_client = TestClient(test_app)
+
+    assert test_client.get("/limited/severities/").status_code == 200
+    assert test_client.get("/limited/severities/_count").status_code == 200
+    response = test_client.get("/limited/severities/")
+    assert response.status_code == 429
+    assert int(response.headers["retry-after"]) > 0
+
+    stats = admission.stats()
+    assert stats["admitted"] == 2
+    assert stats["rate_limited"] == 1
+    assert stats["routes"]["GET /limited/severities/"]["in_flight"] == 0
+
+
+def test_router_total_concurrency(test_app: FastAPI):
+    admission = AdmissionController(rate=None, max_queue=0)
+    assert admission.max_total_concurrency == pool_capacity()
+    router = CollectionsAPIRouter(prefix="/busy", admission=admission)
+    in_flight = [0, 0]
+
+    async def busy():
+        in_flight[0] += 1
+        in_flight[1] = max(in_flight)
+        await asyncio.sleep(0.2)
+        in_flight[0] -= 1
+        return {}
+
+    # each route stays under its own cap, together they exceed the pool
+    for i in range(4):
+        router.add_api_route(f"/{i}", busy, methods=["GET"])
+    test_app.include_router(router)
+    paths = [f"/busy/{i}" for i in range(4)]
+
+    async def spread():
+        async with httpx.AsyncClient(app=test_app, base_url="http://test") as client:
+            return await asyncio.gather(
+                *[client.get(path) for path in paths * admission.max_concurrency]
+            )
+
+    responses = asyncio.run(spread())
+    admitted = [r for r in responses if r.status_code == 200]
+    shed = [r for r in responses if r.status_code == 503]
+    assert len(admitted) == pool_capacity()
+    assert len(admitted) + len(shed) == len(responses)
+    assert all(r.headers["retry-after"] == "1" for r in shed)
+    assert in_flight[1] == pool_capacity()
+    assert admission.stats()["total"]["in_flight"] == 0
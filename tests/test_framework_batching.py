@@ -0,0 +1,140 @@
+import asyncio
+from datetime import datetime
+
+import httpx
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlmodel import Session
+
+from framework.batching import GroupCommitter
+from framework.controller import CollectionsAPIRouter
+from framework.database import get_db
+from src.models.process import Failure
+
+
+def test_group_commit_single_transaction():
+    db = next(get_db())
+    commits = []
+    event.listen(db, "after_commit", lambda session: commits.append(session))
+    committer = GroupCommitter(Failure, max_delay=0.05, max_size=100)
+
+    async def create_all():
+        return await asyncio.gather(
+            *[
+                committer.submit(
+                    db, {"name": f"Leak {i}", "created_at": datetime.now()}
+                )
+                for i in range(10)
+            ]
+        )
+
+    resources = asyncio.run(create_all())
+    assert len(commits) == 1
+    assert [resource.name for resource in resources] == [
+        f"Leak {i}" for i in range(10)
+    ]
+    assert len({resource.id for resource in resources}) == 10
+    assert all(db.get(Failure, resource.id) for resource in resources)
+
+
+def test_group_commit_isolates_errors():
+    db = next(get_db())
+    committer = GroupCommitter(Failure, max_delay=0.05, max_size=3)
+    values = [
+        {"name": "Crack", "created_at": datetime.now()},
+        {"name": None, "created_at": datetime.now()},
+        {"name": "Corrosion", "created_at": datetime.now()},
+    ]
+
+    async def create_all():
+        return await asyncio.gather(
+            *[committer.submit(db, value) for value in values], return_exceptions=True
+        )
+
+    good, bad, other = asyncio.run(create_all())
+    assert good.name == "Crack" and good.id is not None
+    assert other.name == "Corrosion" and other.id is not None
+    assert isinstance(bad, HTTPException)
+    assert bad.status_code == 422
+
+
+def test_router_group_commit(test_app: FastAPI):
+    router = CollectionsAPIRouter([Failure], prefix="/batched", group_commit=True)
+    test_app.include_router(router)
+    test_client = TestClient(test_app)
+
+    response = test_client.post("/batched/failures", json={"name": "Fatigue"})
+    assert response.status_code == 201
+    content = response.json()
+    assert content["name"] == "Fatigue"
+    response = test_client.get(f"/batched/failures/{content['id']}")
+    assert response.status_code == 200
+    assert response.json() == content
+
+
+def test_group_commit_max_size_is_a_hard_limit():
+    batches = []
+    # new still lists the flushed rows during after_flush
+    listener = lambda session, context: batches.append(len(session.new))
+    event.listen(Session, "after_flush", listener)
+    committer = GroupCommitter(Failure, max_delay=0.05, max_size=4)
+
+    async def create_all():
+        # full batches are committed concurrently, each with its leader's session
+        return await asyncio.gather(
+            *[
+                committer.submit(
+                    next(get_db()), {"name": f"Leak {i}", "created_at": datetime.now()}
+                )
+                for i in range(10)
+            ]
+        )
+
+    try:
+        resources = asyncio.run(create_all())
+    finally:
+        event.remove(Session, "after_flush", listener)
+    assert len({resource.id for resource in resources}) == 10
+    assert sorted(batches) == [2, 4, 4]
+
+
+@pytest.mark.parametrize("group_commit", [True, False])
+def test_router_create_constraint_error(test_app: FastAPI, group_commit: bool):
+    router = CollectionsAPIRouter(
+        [Failure], prefix="/constrained", group_commit=group_commit
+    )
+    test_app.include_router(router)
+    test_client = TestClient(test_app)
+
+    # name is optional on the input model but required by the table
+    response = test_client.post("/constrained/failures/", json={"description": "?"})
+    assert response.status_code == 422
+
+
+def test_router_group_commit_concurrent_requests(test_app: FastAPI):
+    router = CollectionsAPIRouter(
+        [Failure], prefix="/batched", group_commit=True, group_commit_delay=0.1
+    )
+    test_app.include_router(router)
+    commits = []
+    listener = lambda session: commits.append(session)
+    event.listen(Session, "after_commit", listener)
+
+    async def create_all():
+        async with httpx.AsyncClient(app=test_app, base_url="http://test") as client:
+            return await asyncio.gather(
+                *[
+                    client.post("/batched/failures/", json={"name": f"Leak {i}"})
+                    for i in range(20)
+                ]
+            )
+
+    try:
+        responses = asyncio.run(create_all())
+    finally:
+        event.remove(Session, "after_commit", listener)
+    assert [response.status_code for response in responses] == [201] * 20
+    assert len({response.json()["id"] for response in responses}) == 20
+    assert len(commits) == 1
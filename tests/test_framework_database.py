@@ -0,0 +1,155 @@
+import asyncio
+import threading
+import time
+from datetime import datetime
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy import text
+from sqlalchemy.pool import QueuePool
+from sqlmodel import Session, SQLModel, create_engine
+
+from framework.controller import CollectionsAPIRouter
+from framework.database import (
+    SQLITE_READ_POOL_SIZE,
+    SQLiteRoutingSession,
+    approximate_count,
+    create_session_factory,
+)
+from src.models.process import Failure
+
+
+def test_sqlite_production_profile(tmp_path):
+    session_factory = create_session_factory(
+        f"sqlite:///{tmp_path / 'db.sqlite3'}", sqlite_profile="production"
+    )
+    with session_factory() as db:
+        assert isinstance(db, SQLiteRoutingSession)
+        assert db.connection().execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert db.connection().execute(text("PRAGMA synchronous")).scalar() == 1
+        assert db.connection().execute(text("PRAGMA busy_timeout")).scalar() == 5000
+        assert db.connection().execute(text("PRAGMA query_only")).scalar() == 1
+
+        failure = Failure(name="Seal leak", created_at=datetime.now())
+        db.add(failure)
+        db.commit()
+        db.refresh(failure)
+        assert db.get(Failure, failure.id).name == "Seal leak"
+
+
+def test_sqlite_production_profile_reads_own_writes(tmp_path):
+    session_factory = create_session_factory(
+        f"sqlite:///{tmp_path / 'db.sqlite3'}", sqlite_profile="production"
+    )
+    with session_factory() as db:
+        db.add(Failure(name="Seal leak", created_at=datetime.now()))
+        db.flush()
+        assert db.query(Failure).count() == 1
+        db.rollback()
+        assert db.query(Failure).count() == 0
+        # a new transaction starts on the readers again
+        assert db.connection().execute(text("PRAGMA query_only")).scalar() == 1
+
+
+def test_sqlite_production_profile_raw_writes(tmp_path):
+    session_factory = create_session_factory(
+        f"sqlite:///{tmp_path / 'db.sqlite3'}", sqlite_profile="production"
+    )
+    with session_factory() as db:
+        db.add(Failure(name="Seal leak", created_at=datetime.now()))
+        db.commit()
+        db.execute(text("ANALYZE"))
+        db.commit()
+        assert approximate_count(db, "failures") == 1
+
+
+def test_sqlite_production_profile_concurrent_writes(tmp_path):
+    session_factory = create_session_factory(
+        f"sqlite:///{tmp_path / 'db.sqlite3'}", sqlite_profile="production"
+    )
+    errors = []
+
+    def write(worker: int):
+        for i in range(20):
+            try:
+                with session_factory() as db:
+                    db.add(Failure(name=f"{worker}.{i}", created_at=datetime.now()))
+                    db.commit()
+                    db.query(Failure).count()
+            except Exception as e:
+                errors.append(e)
+
+    threads = [threading.Thread(target=write, args=(worker,)) for worker in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    with session_factory() as db:
+        assert db.query(Failure).count() == 160
+
+
+def test_sqlite_default_profile(tmp_path):
+    session_factory = create_session_factory(f"sqlite:///{tmp_path / 'db.sqlite3'}")
+    with session_factory() as db:
+        assert not isinstance(db, SQLiteRoutingSession)
+        assert db.connection().execute(text("PRAGMA journal_mode")).scalar() == "delete"
+
+
+def test_sqlite_production_profile_concurrent_requests(tmp_path):
+    session_factory = create_session_factory(
+        f"sqlite:///{tmp_path / 'db.sqlite3'}", sqlite_profile="production"
+    )
+
+    def get_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app = FastAPI()
+    app.include_router(CollectionsAPIRouter([Failure], get_db=Depends(get_db)))
+    with session_factory() as db:
+        db.add(Failure(name="Seal leak", created_at=datetime.now()))
+        db.commit()
+
+    async def run():
+        async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+            return await asyncio.gather(
+                *[
+                    client.request(method, url)
+                    for method, url in [
+                        ("GET", "/failures/"),
+                        ("GET", "/failures/1"),
+                        ("HEAD", "/failures/1"),
+                        ("GET", "/failures/_count"),
+                    ]
+                    * SQLITE_READ_POOL_SIZE
+                ]
+            )
+
+    # more requests than the read pool holds must queue, not stall the event loop
+    started = time.monotonic()
+    responses = asyncio.run(run())
+    assert time.monotonic() - started < 5
+    assert [r.status_code for r in responses] == [200] * 4 * SQLITE_READ_POOL_SIZE
+
+
+def test_approximate_count_uses_session_connection(tmp_path):
+    # a second checkout from this pool would time out
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'db.sqlite3'}",
+        poolclass=QueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.1,
+    )
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as db:
+        db.add(Failure(name="Seal leak", created_at=datetime.now()))
+        db.flush()
+        assert approximate_count(db, "failures") is None
+        db.commit()
+        db.execute(text("ANALYZE"))
+        assert approximate_count(db, "failures") == 1
@@ -0,0 +1,125 @@
+import gzip
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.testclient import TestClient
+from pydantic import BaseModel as PydanticBaseModel
+
+from framework.encoding import (
+    CompressionMiddleware,
+    JSONStreamingResponse,
+    MsgPackStreamingResponse,
+    negotiate_encoding,
+    parse_quality_header,
+    response_encoder,
+)
+
+BODY = b"failure mode " * 200
+
+
+@pytest.fixture
+def compressed_app(test_app: FastAPI) -> FastAPI:
+    @test_app.get("/large", response_class=PlainTextResponse)
+    async def large():
+        return BODY
+
+    @test_app.get("/small", response_class=PlainTextResponse)
+    async def small():
+        return b"ok"
+
+    @test_app.get("/stream")
+    async def stream():
+        async def chunks():
+            for _ in range(200):
+                yield b"failure mode "
+
+        return StreamingResponse(chunks(), media_type="text/plain")
+
+    test_app.add_middleware(CompressionMiddleware, minimum_size=100)
+    return test_app
+
+
+def test_parse_quality_header():
+    assert parse_quality_header("gzip;q=0.5, br, identity;q=0") == {
+        "gzip": 0.5,
+        "br": 1.0,
+        "identity": 0.0,
+    }
+    assert parse_quality_header("") == {}
+
+
+def test_negotiate_encoding():
+    assert negotiate_encoding("") is None
+    assert negotiate_encoding("gzip") == "gzip"
+    assert negotiate_encoding("gzip;q=0, deflate") is None
+    assert negotiate_encoding("*;q=0.1, gzip;q=0.5") in ("br", "gzip")
+
+
+@pytest.mark.parametrize("path", ["/large", "/stream"])
+def test_gzip_compression(compressed_app: FastAPI, path: str):
+    test_client = TestClient(compressed_app)
+    response = test_client.get(path, headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert response.content == BODY
+
+
+@pytest.mark.parametrize("path", ["/large", "/stream"])
+def test_brotli_compression(compressed_app: FastAPI, path: str):
+    brotli = pytest.importorskip("brotli")
+    test_client = TestClient(compressed_app)
+    # httpx only decodes brotli when a brotli package is installed, so decode by hand
+    with test_client.stream("GET", path, headers={"Accept-Encoding": "br"}) as response:
+        assert response.headers["content-encoding"] == "br"
+        raw = b"".join(response.iter_raw())
+    assert brotli.decompress(raw) == BODY
+
+
+def test_small_response_not_compressed(compressed_app: FastAPI):
+    test_client = TestClient(compressed_app)
+    response = test_client.get("/small", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert "content-encoding" not in response.headers
+    assert response.content == b"ok"
+
+
+def test_identity_when_not_accepted(compressed_app: FastAPI):
+    test_client = TestClient(compressed_app)
+    with test_client.stream(
+        "GET", "/large", headers={"Accept-Encoding": "identity"}
+    ) as response:
+        assert "content-encoding" not in response.headers
+        assert b"".join(response.iter_raw()) == BODY
+    with test_client.stream(
+        "GET", "/large", headers={"Accept-Encoding": "gzip"}
+    ) as response:
+        assert gzip.decompress(b"".join(response.iter_raw())) == BODY
+
+
+class Mode(PydanticBaseModel):
+    name: str
+
+
+def test_streaming_responses_use_response_model(test_app: FastAPI):
+    msgpack = pytest.importorskip("msgpack")
+    items = [{"name": f"Leak {i}", "secret": i} for i in range(3000)]
+
+    @test_app.get("/json")
+    def as_json():
+        return JSONStreamingResponse(items, encode=response_encoder(Mode))
+
+    @test_app.get("/msgpack")
+    def as_msgpack():
+        return MsgPackStreamingResponse(items, encode=response_encoder(Mode))
+
+    @test_app.get("/empty")
+    def empty():
+        return JSONStreamingResponse([], encode=response_encoder(Mode))
+
+    test_client = TestClient(test_app)
+    expected = [{"name": f"Leak {i}"} for i in range(3000)]
+    assert test_client.get("/json").json() == expected
+    assert msgpack.unpackb(test_client.get("/msgpack").content) == expected
+    assert test_client.get("/empty").json() == []
@@ -0,0 +1,61 @@
+import json
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from framework.cache import etag_matches
+from framework.openapi import export_openapi, install_openapi_cache
+from src import get_app
+
+
+def test_openapi_cache(test_app: FastAPI):
+    app = get_app(app=test_app)
+    test_client = TestClient(app)
+
+    response = test_client.get("/openapi.json")
+    assert response.status_code == 200
+    assert response.json() == app.openapi()
+    assert "/process/failures/_count" in response.json()["paths"]
+    etag = response.headers["etag"]
+
+    assert etag.startswith('W/"')
+    for if_none_match in [etag, etag[2:], f'"other", {etag}', "*"]:
+        response = test_client.get(
+            "/openapi.json", headers={"If-None-Match": if_none_match}
+        )
+        assert response.status_code == 304
+        assert response.headers["etag"] == etag
+    # the same validator is served for compressed responses
+    response = test_client.get("/openapi.json", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["etag"] == etag
+    assert len([route for route in app.routes if route.path == "/openapi.json"]) == 1
+
+
+def test_openapi_export_and_load(tmp_path):
+    path = str(tmp_path / "openapi.json")
+    export_openapi(get_app(), path)
+    with open(path) as f:
+        exported = json.load(f)
+    assert "/fmea/projects/{id_}" in exported["paths"]
+
+    # a baked schema is served as-is, without generating one for the app
+    exported["info"]["title"] = "Baked"
+    with open(path, "w") as f:
+        json.dump(exported, f)
+    app = FastAPI()
+    install_openapi_cache(app, schema_path=path)
+    response = TestClient(app).get("/openapi.json")
+    assert response.json()["info"]["title"] == "Baked"
+    assert app.openapi()["info"]["title"] == "Baked"
+
+
+def test_etag_matches():
+    assert etag_matches('W/"abc"', 'W/"abc"')
+    assert etag_matches('"abc"', 'W/"abc"')
+    assert etag_matches('W/"abc"', '"abc"')
+    assert etag_matches(' "x" , W/"abc"', 'W/"abc"')
+    assert etag_matches("*", 'W/"abc"')
+    assert not etag_matches('"abcd"', 'W/"abc"')
+    assert not etag_matches(None, 'W/"abc"')
+    assert not etag_matches("", 'W/"abc"')
@@ -135,3 +135,66 @@ def test_router_crud(test_app_with_router: Tuple[CollectionsAPIRouter, FastAPI])
         assert response.status_code == 204
         response = test_client.get(f"{path}/{id_}")
         assert response.status_code == 404
+
+
+def test_router_count_and_exists(test_app_with_router: Tuple[CollectionsAPIRouter, FastAPI]):
+    test_app, router = test_app_with_router
+    test_client = TestClient(test_app)
+
+    for collection in router.collections:
+        collection_name = dasherize(collection.__tablename__)
+        collection_factory = ModelFactory.create_factory(model=collection.input_model())
+        path = f"{router.prefix}/{collection_name}"
+
+        # Test count matches the list endpoint
+        response = test_client.get(f"{path}/_count")
+        assert response.status_code == 200
+        count_content = response.json()
+        assert count_content["approximate"] is False
+        assert count_content["count"] == len(test_client.get(f"{path}/").json())
+
+        # Test filters are honored
+        resource = collection_factory.build()
+        json_payload = json.loads(resource.json())
+        response = test_client.post(path, json=json_payload)
+        id_ = response.json()["id"]
+        response = test_client.get(f"{path}/_count", params={"id": id_})
+        assert response.json()["count"] == 1
+        response = test_client.head(f"{path}/", params={"id": id_})
+        assert response.status_code == 200
+        response = test_client.head(f"{path}/{id_}")
+        assert response.status_code == 200
+
+        # Test approximate counts fall back to an exact count when filtered
+        response = test_client.get(
+            f"{path}/_count", params={"id": id_, "approximate": True}
+        )
+        assert response.json() == {"count": 1, "approximate": False}
+        response = test_client.get(f"{path}/_count", params={"approximate": True})
+        assert response.status_code == 200
+        assert response.json()["count"] >= 0
+
+        # Test soft-deleted resources are not counted
+        test_client.delete(f"{path}/{id_}")
+        response = test_client.get(f"{path}/_count", params={"id": id_})
+        assert response.json()["count"] == 0
+        response = test_client.head(f"{path}/", params={"id": id_})
+        assert response.status_code == 404
+        response = test_client.head(f"{path}/{id_}")
+        assert response.status_code == 404
+
+
+def test_router_get_all_msgpack(test_app_with_router: Tuple[CollectionsAPIRouter, FastAPI]):
+    msgpack = pytest.importorskip("msgpack")
+    test_app, router = test_app_with_router
+    test_client = TestClient(test_app)
+
+    for collection in router.collections:
+        collection_name = dasherize(collection.__tablename__)
+        path = f"{router.prefix}/{collection_name}/"
+        json_response = test_client.get(path)
+        response = test_client.get(path, headers={"Accept": "application/msgpack"})
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/msgpack"
+        assert response.headers["vary"] == "Accept"
+        assert msgpack.unpackb(response.content) == json_response.json()